@@ -4,20 +4,42 @@ Spec-driven development manager for AI agents
 Helps manage specifications, tasks, and implementation workflow
 """
 
+import errno
 import json
 import os
+import re
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple, Callable, Iterator
 import argparse
 import shutil
+import heapq
+from concurrent.futures import ThreadPoolExecutor
 
 class SpecManager:
+    # One pass over a task file picks out every field we care about. Criteria
+    # lines are tried before metadata so their text is never read as a field;
+    # a metadata line may carry both priority and dependencies. Lines that
+    # match `other` (non-empty, not a list item) close the acceptance criteria.
+    _FIELD_RE = re.compile(
+        r"^(?P<crit_marker>[^\n]*Acceptance Criteria[^\n]*)"
+        r"|^[ \t]*- \[ \][ \t]*(?P<criterion>[^\n]*)"
+        r"|^(?P<meta>[^\n]*?(?:Priority: P|Depends on:)[^\n]*)"
+        r"|^[ \t]*(?P<other>[^-\s][^\n]*)",
+        re.M
+    )
+    
     def __init__(self, project_root: Path = None):
         self.project_root = project_root or Path.cwd()
         self.specs_dir = self.project_root / "specs"
         self.tasks_dir = self.specs_dir / "tasks"
+        # status -> (directory mtime_ns, task filenames)
+        self._scan_cache: Dict[str, Tuple[int, List[str]]] = {}
+        # task file path -> (file mtime_ns, parsed details)
+        self._task_cache: Dict[Path, Tuple[int, Dict[str, Any]]] = {}
+        # task_id -> (status, path), built lazily
+        self._index: Optional[Dict[str, Tuple[str, Path]]] = None
         
     def load_specification(self, spec_path: str) -> str:
         """Load and return specification content"""
@@ -26,57 +48,240 @@ class SpecManager:
             raise FileNotFoundError(f"Specification not found: {path}")
         return path.read_text()
     
-    def list_tasks(self, status: str = "backlog") -> List[str]:
-        """List all tasks with given status"""
+    def _scan_status(self, status: str) -> List[str]:
+        """Return task filenames in a status directory, cached by directory mtime"""
         status_dir = self.tasks_dir / status
-        if not status_dir.exists():
+        try:
+            mtime = os.stat(status_dir).st_mtime_ns
+        except FileNotFoundError:
+            self._scan_cache.pop(status, None)
             return []
         
-        tasks = []
-        for task_file in status_dir.glob("TASK-*.md"):
-            tasks.append(task_file.name)
-        return sorted(tasks)
+        cached = self._scan_cache.get(status)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        
+        with os.scandir(status_dir) as it:
+            names = [e.name for e in it
+                     if e.name.startswith("TASK-") and e.name.endswith(".md")]
+        self._scan_cache[status] = (mtime, names)
+        return names
     
-    def get_task_details(self, task_id: str) -> Dict[str, Any]:
-        """Get details about a specific task"""
-        # Search in all status directories
+    def list_tasks(self, status: str = "backlog") -> List[str]:
+        """List all tasks with given status"""
+        return sorted(self._scan_status(status))
+    
+    @staticmethod
+    def _task_id_from_name(name: str) -> str:
+        """Return the TASK-XXX id from a task filename"""
+        return '-'.join(name[:-len(".md")].split('-', 2)[:2])
+    
+    def _build_index(self) -> Dict[str, Tuple[str, Path]]:
+        """Map every task id to its status and file path"""
+        index = {}
         for status in ["backlog", "in-progress", "completed"]:
-            status_dir = self.tasks_dir / status
-            for task_file in status_dir.glob(f"{task_id}*.md"):
-                content = task_file.read_text()
-                
-                # Parse task details from markdown
-                details = {
-                    "id": task_id,
-                    "status": status,
-                    "file": str(task_file),
-                    "content": content
-                }
-                
-                # Extract priority
-                if "Priority: P0" in content:
-                    details["priority"] = "P0"
-                elif "Priority: P1" in content:
-                    details["priority"] = "P1"
-                elif "Priority: P2" in content:
-                    details["priority"] = "P2"
-                else:
-                    details["priority"] = "P3"
-                
-                # Extract dependencies
-                if "Depends on:" in content:
-                    deps_line = [line for line in content.split('\n') 
-                                if "Depends on:" in line][0]
-                    deps = deps_line.split("Depends on:")[1].strip()
-                    details["dependencies"] = deps
-                
-                return details
+            for name in self._scan_status(status):
+                task_id = self._task_id_from_name(name)
+                index.setdefault(task_id, (status, self.tasks_dir / status / name))
+        return index
+    
+    def _invalidate_index(self) -> None:
+        """Force the task index to be rebuilt on next lookup"""
+        self._index = None
+    
+    def _summarize(self) -> Dict[str, List[str]]:
+        """Return the unsorted task filenames for every status in one pass"""
+        return {status: self._scan_status(status)
+                for status in ["backlog", "in-progress", "completed"]}
+    
+    def _find_task(self, task_id: str) -> Tuple[str, Path]:
+        """Locate a task file, returning its status and path"""
+        if self._index is None:
+            self._index = self._build_index()
+        
+        entry = self._index.get(task_id)
+        if entry is None or not entry[1].exists():
+            # Files may have changed outside this instance; rebuild once
+            self._index = self._build_index()
+            entry = self._index.get(task_id)
+        
+        if entry is None:
+            # Fall back to a filename prefix match (e.g. "TASK-01")
+            for status in ["backlog", "in-progress", "completed"]:
+                for name in sorted(self._scan_status(status)):
+                    if name.startswith(task_id):
+                        return status, self.tasks_dir / status / name
+            raise ValueError(f"Task not found: {task_id}")
+        
+        return entry
+    
+    def _read_many(self, paths: List[Path],
+                   reader: Callable[[Path], Any] = Path.read_text) -> Dict[Path, Any]:
+        """Read several files concurrently, skipping any that fail"""
+        def read(path: Path) -> Tuple[Path, Any]:
+            try:
+                return path, reader(path)
+            except (OSError, ValueError) as e:
+                # ValueError covers UnicodeDecodeError from undecodable files
+                print(f"Warning: could not read {path}: {e}", file=sys.stderr)
+                return path, None
+        
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            results = executor.map(read, paths)
+            return {path: value for path, value in results if value is not None}
+    
+    @staticmethod
+    def _parse_priority(text: str) -> str:
+        """Classify priority from the character following the first 'Priority: P' marker"""
+        idx = text.find("Priority: P")
+        if idx >= 0 and idx + 11 < len(text):
+            c = text[idx + 11]
+            return f"P{c}" if c in "0123" else "P3"
+        return "P3"
+    
+    def _parse_fields(self, matches: Iterator["re.Match[str]"],
+                      with_criteria: bool = True) -> Dict[str, Any]:
+        """Extract priority, dependencies and acceptance criteria from _FIELD_RE matches"""
+        priority = None
+        dependencies = None
+        criteria = []
+        criteria_section = False
+        
+        for m in matches:
+            if m.group("crit_marker") is not None:
+                criteria_section = True
+                continue
+            if m.group("criterion") is not None:
+                if criteria_section:
+                    criteria.append(m.group("criterion").strip())
+                continue
+            if criteria_section and not m.group(0).lstrip().startswith("-"):
+                criteria_section = False
+            
+            line = m.group("meta")
+            if line is not None:
+                if priority is None and "Priority: P" in line:
+                    priority = self._parse_priority(line)
+                if dependencies is None and "Depends on:" in line:
+                    dependencies = line.split("Depends on:", 1)[1].strip()
+            
+            # Criteria can appear anywhere, so only stop early when they aren't
+            # wanted. Tasks without a "Depends on:" line are still read to the end.
+            if not with_criteria and priority and dependencies is not None:
+                break
+        
+        fields = {"priority": priority or "P3"}
+        if with_criteria:
+            fields["acceptance_criteria"] = criteria
+        if dependencies is not None:
+            fields["dependencies"] = dependencies
+        return fields
+    
+    def _parse_task_header(self, path: Path, with_criteria: bool = True) -> Dict[str, Any]:
+        """Parse task fields line by line, stopping once they have all been found"""
+        with open(path, 'r', buffering=65536) as f:
+            matches = (m for m in map(self._FIELD_RE.match, f) if m)
+            return self._parse_fields(matches, with_criteria)
+    
+    def _parse_task(self, task_id: str, status: str, task_file: Path,
+                    content: Optional[str] = None, with_criteria: bool = True) -> Dict[str, Any]:
+        """Parse task details from markdown, streaming only the header if content is not given"""
+        details = {
+            "id": task_id,
+            "status": status,
+            "file": str(task_file)
+        }
+        
+        if content is None:
+            details.update(self._parse_task_header(task_file, with_criteria))
+        else:
+            details["content"] = content
+            details.update(self._parse_fields(self._FIELD_RE.finditer(content)))
+        
+        return details
+    
+    def _get_cached_task(self, task_file: Path, with_content: bool,
+                         with_criteria: bool) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Return the file's mtime_ns and its cached details if still fresh"""
+        mtime = os.stat(task_file).st_mtime_ns
+        cached = self._task_cache.get(task_file)
+        if (cached and cached[0] == mtime
+                and (not with_content or "content" in cached[1])
+                and (not with_criteria or "acceptance_criteria" in cached[1])):
+            return mtime, cached[1]
+        return mtime, None
+    
+    @staticmethod
+    def _copy_details(details: Dict[str, Any], task_id: str) -> Dict[str, Any]:
+        """Copy cached details, including the criteria list, so callers can't mutate the cache"""
+        copy = dict(details, id=task_id)
+        if "acceptance_criteria" in copy:
+            copy["acceptance_criteria"] = list(copy["acceptance_criteria"])
+        return copy
+    
+    def get_task_details(self, task_id: str, with_content: bool = True,
+                         with_criteria: bool = True) -> Dict[str, Any]:
+        """Get details about a specific task"""
+        status, task_file = self._find_task(task_id)
+        mtime, details = self._get_cached_task(task_file, with_content, with_criteria)
+        if details is None:
+            content = task_file.read_text() if with_content else None
+            details = self._parse_task(task_id, status, task_file, content, with_criteria)
+            self._task_cache[task_file] = (mtime, details)
+        return self._copy_details(details, task_id)
+    
+    def _load_tasks(self, entries: List[Tuple[str, str, Path]], with_content: bool,
+                    with_criteria: bool) -> Dict[Path, Dict[str, Any]]:
+        """Load (task_id, status, path) entries concurrently, keyed by path and skipping unreadable files"""
+        results = {}
+        stale = {}
+        for task_id, status, path in entries:
+            if path in results or path in stale:
+                continue
+            try:
+                mtime, details = self._get_cached_task(path, with_content, with_criteria)
+            except OSError as e:
+                print(f"Warning: could not read {path}: {e}", file=sys.stderr)
+                continue
+            if details is None:
+                stale[path] = (task_id, status, mtime)
+            else:
+                results[path] = details
+        
+        def load(path: Path) -> Dict[str, Any]:
+            task_id, status, _ = stale[path]
+            content = path.read_text() if with_content else None
+            return self._parse_task(task_id, status, path, content, with_criteria)
+        
+        loaded = self._read_many(list(stale), load)
+        for path, details in loaded.items():
+            self._task_cache[path] = (stale[path][2], details)
+            results[path] = details
+        
+        return results
+    
+    def get_many_task_details(self, task_ids: List[str], with_content: bool = True,
+                              with_criteria: bool = True) -> Dict[str, Dict[str, Any]]:
+        """Get details for several tasks concurrently, skipping any that cannot be found or read"""
+        entries = []
+        for task_id in task_ids:
+            try:
+                status, path = self._find_task(task_id)
+            except ValueError as e:
+                print(f"Warning: skipping {task_id}: {e}", file=sys.stderr)
+                continue
+            entries.append((task_id, status, path))
         
-        raise ValueError(f"Task not found: {task_id}")
+        loaded = self._load_tasks(entries, with_content, with_criteria)
+        return {
+            task_id: self._copy_details(loaded[path], task_id)
+            for task_id, _, path in entries
+            if path in loaded
+        }
     
     def move_task(self, task_id: str, new_status: str) -> bool:
         """Move task to different status"""
-        task = self.get_task_details(task_id)
+        task = self.get_task_details(task_id, with_content=False, with_criteria=False)
         old_path = Path(task["file"])
         new_dir = self.tasks_dir / new_status
         new_path = new_dir / old_path.name
@@ -84,8 +289,18 @@ class SpecManager:
         # Create directory if needed
         new_dir.mkdir(parents=True, exist_ok=True)
         
-        # Move the file
-        shutil.move(str(old_path), str(new_path))
+        # Move the file; a rename is atomic within the same filesystem
+        try:
+            os.replace(old_path, new_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.move(str(old_path), str(new_path))
+        
+        self._scan_cache.pop(task["status"], None)
+        self._scan_cache.pop(new_status, None)
+        self._task_cache.pop(old_path, None)
+        self._invalidate_index()
         
         print(f"Moved {task_id} from {task['status']} to {new_status}")
         return True
@@ -125,7 +340,7 @@ Please implement this task following the specification exactly.
     
     def validate_implementation(self, task_id: str, implementation_path: str) -> Dict[str, Any]:
         """Check if implementation meets acceptance criteria"""
-        task = self.get_task_details(task_id)
+        task = self.get_task_details(task_id, with_content=False)
         validation_results = {
             "task_id": task_id,
             "timestamp": datetime.now().isoformat(),
@@ -134,23 +349,8 @@ Please implement this task following the specification exactly.
             "warnings": []
         }
         
-        # Parse acceptance criteria from task
-        content = task["content"]
-        criteria_section = False
-        criteria = []
-        
-        for line in content.split('\n'):
-            if "Acceptance Criteria" in line:
-                criteria_section = True
-                continue
-            if criteria_section and line.strip().startswith("- [ ]"):
-                criterion = line.strip()[5:].strip()
-                criteria.append(criterion)
-            elif criteria_section and line.strip() and not line.strip().startswith("-"):
-                criteria_section = False
-        
         # For now, return criteria list for manual validation
-        validation_results["criteria"] = criteria
+        validation_results["criteria"] = task["acceptance_criteria"]
         validation_results["needs_manual_review"] = True
         
         return validation_results
@@ -162,52 +362,120 @@ Please implement this task following the specification exactly.
         
         return self.move_task(task_id, status)
     
-    def create_progress_report(self) -> str:
+    def create_progress_report(self, include_priorities: bool = False) -> str:
         """Generate a progress report of all tasks"""
-        report = "# Task Progress Report\n\n"
-        report += f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+        parts: List[str] = []
+        parts.append("# Task Progress Report\n\n")
+        parts.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
         
-        # Count tasks by status
-        backlog = self.list_tasks("backlog")
-        in_progress = self.list_tasks("in-progress")
-        completed = self.list_tasks("completed")
+        # Count tasks by status; only the listed slices need ordering
+        summary = self._summarize()
+        backlog = summary["backlog"]
+        in_progress = sorted(summary["in-progress"])
+        completed = summary["completed"]
+        total = len(backlog) + len(in_progress) + len(completed)
         
-        report += "## Summary\n"
-        report += f"- Backlog: {len(backlog)} tasks\n"
-        report += f"- In Progress: {len(in_progress)} tasks\n"
-        report += f"- Completed: {len(completed)} tasks\n"
-        report += f"- Total: {len(backlog) + len(in_progress) + len(completed)} tasks\n\n"
+        parts.append(
+            "## Summary\n"
+            f"- Backlog: {len(backlog)} tasks\n"
+            f"- In Progress: {len(in_progress)} tasks\n"
+            f"- Completed: {len(completed)} tasks\n"
+            f"- Total: {total} tasks\n\n"
+        )
         
         # Calculate completion percentage
-        total = len(backlog) + len(in_progress) + len(completed)
         if total > 0:
             completion = (len(completed) / total) * 100
-            report += f"**Completion: {completion:.1f}%**\n\n"
+            parts.append(f"**Completion: {completion:.1f}%**\n\n")
+        
+        # Break down open tasks by priority (requires reading task files)
+        if include_priorities and (backlog or in_progress):
+            # Count by file so tasks sharing an id are not collapsed
+            entries = [(self._task_id_from_name(name), status, self.tasks_dir / status / name)
+                       for status in ["backlog", "in-progress"]
+                       for name in summary[status]]
+            counts = {"P0": 0, "P1": 0, "P2": 0, "P3": 0}
+            found = self._load_tasks(entries, with_content=False, with_criteria=False)
+            for details in found.values():
+                counts[details["priority"]] += 1
+            skipped = sorted(path.name for _, _, path in entries if path not in found)
+            
+            parts.append("## Open Tasks by Priority\n")
+            parts.extend(f"- {priority}: {count} tasks\n" for priority, count in counts.items())
+            if skipped:
+                parts.append(f"- Could not read: {', '.join(skipped)}\n")
+            parts.append("\n")
         
         # List tasks by status
         if in_progress:
-            report += "## In Progress\n"
-            for task in in_progress:
-                task_id = task.split('-')[1]
-                report += f"- {task}\n"
-            report += "\n"
+            parts.append("## In Progress\n")
+            parts.extend(f"- {task}\n" for task in in_progress)
+            parts.append("\n")
         
         if backlog:
-            report += "## Backlog (Next Up)\n"
-            for task in backlog[:5]:  # Show top 5
-                task_id = task.split('-')[1]
-                report += f"- {task}\n"
+            parts.append("## Backlog (Next Up)\n")
+            parts.extend(f"- {task}\n" for task in heapq.nsmallest(5, backlog))  # Show top 5
             if len(backlog) > 5:
-                report += f"- ...and {len(backlog) - 5} more\n"
-            report += "\n"
+                parts.append(f"- ...and {len(backlog) - 5} more\n")
+            parts.append("\n")
         
         if completed:
-            report += "## Recently Completed\n"
-            for task in completed[-5:]:  # Show last 5
-                report += f"- ✅ {task}\n"
-            report += "\n"
+            parts.append("## Recently Completed\n")
+            recent = sorted(heapq.nlargest(5, completed))  # Show last 5
+            parts.extend(f"- ✅ {task}\n" for task in recent)
+            parts.append("\n")
         
-        return report
+        return "".join(parts)
+
+def _cmd_list(manager: SpecManager, args: argparse.Namespace) -> None:
+    """List tasks for a status"""
+    tasks = manager.list_tasks(args.status)
+    if tasks:
+        print(f"\n{args.status.upper()} Tasks:")
+        for task in tasks:
+            print(f"  - {task}")
+    else:
+        print(f"No tasks in {args.status}")
+
+def _cmd_show(manager: SpecManager, args: argparse.Namespace) -> None:
+    """Print a task's details and content"""
+    details = manager.get_task_details(args.task_id)
+    print(f"\nTask: {details['id']}")
+    print(f"Status: {details['status']}")
+    print(f"Priority: {details.get('priority', 'Unknown')}")
+    if 'dependencies' in details:
+        print(f"Dependencies: {details['dependencies']}")
+    print("\n--- Task Content ---")
+    print(details['content'])
+
+def _cmd_move(manager: SpecManager, args: argparse.Namespace) -> None:
+    """Move a task to a new status"""
+    manager.move_task(args.task_id, args.status)
+
+def _cmd_prompt(manager: SpecManager, args: argparse.Namespace) -> None:
+    """Print the implementation prompt for a task"""
+    prompt = manager.generate_implementation_prompt(args.task_id)
+    print(prompt)
+
+def _cmd_validate(manager: SpecManager, args: argparse.Namespace) -> None:
+    """Print validation results as JSON"""
+    results = manager.validate_implementation(args.task_id, args.path)
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+def _cmd_report(manager: SpecManager, args: argparse.Namespace) -> None:
+    """Print the progress report"""
+    report = manager.create_progress_report(args.priorities)
+    print(report)
+
+_COMMANDS: Dict[str, Callable[[SpecManager, argparse.Namespace], None]] = {
+    "list": _cmd_list,
+    "show": _cmd_show,
+    "move": _cmd_move,
+    "prompt": _cmd_prompt,
+    "validate": _cmd_validate,
+    "report": _cmd_report,
+}
 
 def main():
     parser = argparse.ArgumentParser(description="Spec-driven development manager")
@@ -240,6 +508,8 @@ def main():
     
     # Progress report command
     report_parser = subparsers.add_parser("report", help="Generate progress report")
+    report_parser.add_argument("--priorities", action="store_true",
+                              help="Include a breakdown of open tasks by priority")
     
     args = parser.parse_args()
     
@@ -250,39 +520,9 @@ def main():
     manager = SpecManager()
     
     try:
-        if args.command == "list":
-            tasks = manager.list_tasks(args.status)
-            if tasks:
-                print(f"\n{args.status.upper()} Tasks:")
-                for task in tasks:
-                    print(f"  - {task}")
-            else:
-                print(f"No tasks in {args.status}")
-        
-        elif args.command == "show":
-            details = manager.get_task_details(args.task_id)
-            print(f"\nTask: {details['id']}")
-            print(f"Status: {details['status']}")
-            print(f"Priority: {details.get('priority', 'Unknown')}")
-            if 'dependencies' in details:
-                print(f"Dependencies: {details['dependencies']}")
-            print("\n--- Task Content ---")
-            print(details['content'])
-        
-        elif args.command == "move":
-            manager.move_task(args.task_id, args.status)
-        
-        elif args.command == "prompt":
-            prompt = manager.generate_implementation_prompt(args.task_id)
-            print(prompt)
-        
-        elif args.command == "validate":
-            results = manager.validate_implementation(args.task_id, args.path)
-            print(json.dumps(results, indent=2))
-        
-        elif args.command == "report":
-            report = manager.create_progress_report()
-            print(report)
+        handler = _COMMANDS.get(args.command)
+        if handler:
+            handler(manager, args)
     
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)